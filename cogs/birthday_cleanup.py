@@ -0,0 +1,268 @@
+"""
+Module de nettoyage des anniversaires des membres ayant quitté le serveur
+"""
+
+import discord
+from discord.ext import commands, tasks
+from discord.commands import slash_command
+import json
+from datetime import datetime, timedelta
+import os
+
+# Politique de rétention
+PRUNE_GRACE_DAYS = int(os.getenv('PRUNE_GRACE_DAYS', 7))      # délai avant suppression après un départ
+PRUNE_REPORT_DAYS = int(os.getenv('PRUNE_REPORT_DAYS', 30))   # conservation de l'historique des suppressions
+
+class BirthdayCleanup(commands.Cog):
+    """Suppression par lots des anniversaires des membres partis"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.data_file = 'data/birthdays.json'
+        self.departures_file = 'data/departures.json'
+        
+        # Chargement de la configuration
+        with open('config.json', 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        
+        self.prune_departed.start()
+    
+    def cog_unload(self):
+        """Arrêt de la tâche lors du déchargement du cog"""
+        self.prune_departed.cancel()
+    
+    def color(self, name):
+        """Couleur d'embed définie dans config.json"""
+        return discord.Color(int(self.config['color'][name].lstrip('#'), 16))
+    
+    def load_birthdays(self):
+        """Charge les anniversaires depuis le fichier JSON"""
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"birthdays": {}}
+    
+    def save_birthdays(self, data):
+        """Sauvegarde les anniversaires dans le fichier JSON"""
+        with open(self.data_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    
+    def load_departures(self):
+        """Charge la file des départs et l'historique des suppressions"""
+        try:
+            with open(self.departures_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"pending": {}, "pruned": []}
+    
+    def save_departures(self, departures):
+        """Sauvegarde la file des départs et l'historique des suppressions"""
+        with open(self.departures_file, 'w', encoding='utf-8') as f:
+            json.dump(departures, f, indent=2, ensure_ascii=False)
+    
+    def queue_departure(self, user, guild_id):
+        """Ajoute un membre parti à la file de suppression (s'il a un anniversaire)"""
+        
+        user_id = str(user.id)
+        data = self.load_birthdays()
+        if user_id not in data['birthdays']:
+            return
+        
+        departures = self.load_departures()
+        if user_id in departures['pending']:
+            return
+        
+        departures['pending'][user_id] = {
+            'guild_id': guild_id,
+            'left_at': datetime.now().isoformat(),
+            'display_name': getattr(user, 'display_name', user.name)
+        }
+        self.save_departures(departures)
+        print(f"👋 {user} a quitté le serveur, anniversaire supprimé dans {PRUNE_GRACE_DAYS} jour(s)")
+    
+    @commands.Cog.listener()
+    async def on_config_update(self, config):
+        """Applique la nouvelle configuration sans recharger le cog"""
+        self.config = config
+    
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        """Met en file un membre qui quitte le serveur"""
+        self.queue_departure(member, member.guild.id)
+    
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        """Met en file un membre qui quitte le serveur même s'il n'était pas en cache"""
+        self.queue_departure(payload.user, payload.guild_id)
+    
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Annule la suppression si le membre revient pendant le délai de grâce"""
+        departures = self.load_departures()
+        if departures['pending'].pop(str(member.id), None):
+            self.save_departures(departures)
+            print(f"↩️ {member} est revenu, suppression de son anniversaire annulée")
+    
+    @tasks.loop(hours=1)
+    async def prune_departed(self):
+        """Supprime en une seule écriture les anniversaires des membres partis"""
+        
+        departures = self.load_departures()
+        now = datetime.now()
+        limit = now - timedelta(days=PRUNE_GRACE_DAYS)
+        
+        due = {
+            user_id: info for user_id, info in departures['pending'].items()
+            if datetime.fromisoformat(info['left_at']) <= limit
+        }
+        
+        # Historique : on ne garde que les suppressions récentes
+        report_limit = (now - timedelta(days=PRUNE_REPORT_DAYS)).isoformat()
+        kept_report = [entry for entry in departures['pruned'] if entry['pruned_at'] >= report_limit]
+        changed = len(kept_report) != len(departures['pruned'])
+        departures['pruned'] = kept_report
+        
+        if not due:
+            if changed:
+                self.save_departures(departures)
+            return
+        
+        data = self.load_birthdays()
+        pruned = {}
+        
+        for user_id, info in due.items():
+            del departures['pending'][user_id]
+            
+            # Membre revenu sans que l'événement ait été reçu
+            guild = self.bot.get_guild(info['guild_id'])
+            if guild and guild.get_member(int(user_id)):
+                continue
+            
+            birthday = data['birthdays'].pop(user_id, None)
+            if birthday:
+                pruned[user_id] = (birthday, info)
+        
+        if pruned:
+            self.save_birthdays(data)
+            for user_id, (birthday, info) in pruned.items():
+                self.bot.dispatch('birthday_update', user_id, birthday, None)
+        
+        # Sauvegarde avant les appels HTTP : un départ ou un retour reçu pendant
+        # la suppression des événements ne doit pas être écrasé
+        self.save_departures(departures)
+        
+        if not pruned:
+            return
+        
+        events_deleted = await self.delete_events(pruned)
+        
+        departures = self.load_departures()
+        for user_id, (birthday, info) in pruned.items():
+            departures['pruned'].append({
+                'user_id': user_id,
+                'username': birthday.get('username'),
+                'display_name': info['display_name'],
+                'day': birthday['day'],
+                'month': birthday['month'],
+                'left_at': info['left_at'],
+                'pruned_at': now.isoformat(),
+                'events_deleted': events_deleted.get(user_id, 0)
+            })
+        self.save_departures(departures)
+        
+        print(f"🧹 {len(pruned)} anniversaire(s) de membres partis supprimé(s)")
+    
+    @prune_departed.before_loop
+    async def before_prune_departed(self):
+        """Attend que le bot soit prêt avant le premier nettoyage"""
+        await self.bot.wait_until_ready()
+    
+    async def delete_events(self, pruned):
+        """Supprime les événements d'anniversaires des membres partis"""
+        
+        # Noms d'événements possibles par serveur : "🎂 Anniversaire de <nom>[ (<âge> ans)]"
+        by_guild = {}
+        for user_id, (birthday, info) in pruned.items():
+            names = {f"🎂 Anniversaire de {name}".lower() for name in (info['display_name'], birthday.get('username')) if name}
+            by_guild.setdefault(info['guild_id'], {})[user_id] = names
+        
+        events_deleted = {}
+        for guild_id, users in by_guild.items():
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                continue
+            
+            try:
+                existing_events = await guild.fetch_scheduled_events()
+            except discord.HTTPException as e:
+                print(f"❌ Impossible de récupérer les événements: {e}")
+                continue
+            
+            for event in existing_events:
+                event_name = event.name.lower()
+                for user_id, names in users.items():
+                    if any(event_name == name or event_name.startswith(f"{name} (") for name in names):
+                        try:
+                            await event.delete()
+                            events_deleted[user_id] = events_deleted.get(user_id, 0) + 1
+                        except discord.HTTPException as e:
+                            print(f"❌ Erreur lors de la suppression de '{event.name}': {e}")
+                        break
+        
+        return events_deleted
+    
+    @slash_command(
+        name="anniv_pruned",
+        description="[ADMIN] Voir les anniversaires supprimés après un départ"
+    )
+    @commands.has_permissions(administrator=True)
+    async def pruned_report(self, ctx):
+        """Affiche la file des départs et les dernières suppressions (admin uniquement)"""
+        
+        # Vérification supplémentaire des permissions
+        if not ctx.author.guild_permissions.administrator:
+            await ctx.respond(
+                "❌ Vous devez être administrateur pour utiliser cette commande.",
+                ephemeral=True
+            )
+            return
+        
+        departures = self.load_departures()
+        
+        embed = discord.Embed(
+            title="🧹 Nettoyage des membres partis",
+            color=self.color('info')
+        )
+        
+        pending_lines = []
+        for user_id, info in departures['pending'].items():
+            due_date = datetime.fromisoformat(info['left_at']) + timedelta(days=PRUNE_GRACE_DAYS)
+            pending_lines.append(f"`{info['display_name']:<15} {due_date.strftime('%d/%m/%Y')}`")
+        
+        embed.add_field(
+            name=f"⏳ En attente ({len(pending_lines)})",
+            value="\n".join(pending_lines[:10]) if pending_lines else "Aucun",
+            inline=False
+        )
+        
+        pruned_lines = []
+        for entry in reversed(departures['pruned']):
+            pruned_at = datetime.fromisoformat(entry['pruned_at']).strftime('%d/%m/%Y')
+            pruned_lines.append(
+                f"`{entry['display_name']:<15} {entry['day']:02d}/{entry['month']:02d}` "
+                f"supprimé le {pruned_at} ({entry['events_deleted']} événement(s))"
+            )
+        
+        embed.add_field(
+            name=f"🗑️ Supprimés ({len(pruned_lines)})",
+            value="\n".join(pruned_lines[:10]) if pruned_lines else "Aucun",
+            inline=False
+        )
+        
+        embed.set_footer(text=f"💡 Délai de grâce : {PRUNE_GRACE_DAYS} jour(s) - historique conservé {PRUNE_REPORT_DAYS} jour(s)")
+        
+        await ctx.respond(embed=embed, ephemeral=True)
+
+def setup(bot):
+    bot.add_cog(BirthdayCleanup(bot))
@@ -7,9 +7,138 @@ from discord.ext import commands
 from discord.commands import slash_command, Option
 from discord import ScheduledEventLocation
 import json
+from bisect import bisect_left, insort
+from collections import Counter
 from datetime import datetime
 from typing import Optional
+import heapq
 import os
+import unicodedata
+
+class NameIndex:
+    """Index des noms pour l'autocomplétion : préfixes triés + trigrammes"""
+    
+    def __init__(self):
+        self.names = {}      # user_id -> (pseudo du serveur, nom enregistré)
+        self.keys = []       # liste triée de (préfixe normalisé, user_id)
+        self.trigrams = {}   # trigramme -> user_ids
+    
+    @staticmethod
+    def normalize(text):
+        """Minuscules sans accents pour comparer les noms"""
+        text = unicodedata.normalize('NFKD', text)
+        return ''.join(c for c in text if not unicodedata.combining(c)).casefold().strip()
+    
+    def tokens(self, names):
+        """Clés de préfixe : nom complet et chacun de ses mots"""
+        tokens = set()
+        for name in filter(None, names):
+            normalized = self.normalize(name)
+            tokens.add(normalized)
+            tokens.update(normalized.split())
+        tokens.discard('')
+        return tokens
+    
+    def grams(self, text):
+        """Trigrammes d'un texte normalisé"""
+        padded = f" {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def rebuild(self, entries):
+        """Construit l'index complet en un seul tri (user_id -> noms)"""
+        self.names = {}
+        self.trigrams = {}
+        keys = []
+        for user_id, names in entries.items():
+            names = tuple(names)
+            self.names[user_id] = names
+            for token in self.tokens(names):
+                keys.append((token, user_id))
+                for gram in self.grams(token):
+                    self.trigrams.setdefault(gram, set()).add(user_id)
+        keys.sort()
+        self.keys = keys
+    
+    def add(self, user_id, names):
+        """Ajoute ou remplace les noms d'un utilisateur"""
+        names = tuple(names)
+        if self.names.get(user_id) == names:
+            return
+        self.remove(user_id)
+        self.names[user_id] = names
+        for token in self.tokens(names):
+            insort(self.keys, (token, user_id))
+            for gram in self.grams(token):
+                self.trigrams.setdefault(gram, set()).add(user_id)
+    
+    def remove(self, user_id):
+        """Retire un utilisateur de l'index"""
+        names = self.names.pop(user_id, None)
+        if not names:
+            return
+        for token in self.tokens(names):
+            i = bisect_left(self.keys, (token, user_id))
+            if i < len(self.keys) and self.keys[i] == (token, user_id):
+                del self.keys[i]
+            for gram in self.grams(token):
+                users = self.trigrams.get(gram)
+                if users:
+                    users.discard(user_id)
+                    if not users:
+                        del self.trigrams[gram]
+    
+    def search(self, query, limit=25):
+        """Retourne les user_ids correspondant au début du nom, puis les plus proches"""
+        query = self.normalize(query)
+        results = []
+        
+        # Correspondances par préfixe (recherche dichotomique)
+        i = bisect_left(self.keys, (query,))
+        while i < len(self.keys) and len(results) < limit and self.keys[i][0].startswith(query):
+            user_id = self.keys[i][1]
+            if user_id not in results:
+                results.append(user_id)
+            i += 1
+        
+        # Complément approximatif : trigrammes en commun (fautes de frappe, sous-chaînes)
+        if len(results) < limit and len(query) >= 2:
+            query_grams = self.grams(query)
+            scores = Counter()
+            for gram in query_grams:
+                scores.update(self.trigrams.get(gram, ()))
+            found = set(results)
+            candidates = (
+                (score, user_id) for user_id, score in scores.items()
+                if user_id not in found and score * 3 >= len(query_grams)
+            )
+            results.extend(user_id for _, user_id in heapq.nlargest(limit - len(results), candidates))
+        
+        return results
+    
+    def export(self):
+        """État de l'index sous forme de types natifs (pour le snapshot)"""
+        return {'names': self.names, 'keys': self.keys, 'trigrams': self.trigrams}
+    
+    def load(self, state):
+        """Restaure l'index depuis un snapshot"""
+        self.names = state['names']
+        self.keys = state['keys']
+        self.trigrams = state['trigrams']
+    
+    def label(self, user_id):
+        """Texte affiché dans l'autocomplétion"""
+        names = list(dict.fromkeys(filter(None, self.names.get(user_id, ()))))
+        if len(names) > 1:
+            return f"{names[0]} ({names[1]})"
+        return names[0] if names else user_id
+
+async def search_birthdays(ctx: discord.AutocompleteContext):
+    """Autocomplétion de /anniv_get sur les pseudos et noms enregistrés"""
+    index = ctx.cog.name_index
+    return [
+        discord.OptionChoice(name=index.label(user_id)[:100], value=user_id)
+        for user_id in index.search(ctx.value or '')
+    ]
 
 class BirthdayCommands(commands.Cog):
     """Commandes pour gérer les anniversaires"""
@@ -24,6 +153,14 @@ class BirthdayCommands(commands.Cog):
         
         self.months_fr = self.config['months_fr']
         self.emojis = self.config['emojis']
+        
+        # Index des noms, restauré par le cog WarmStart ou construit au on_ready
+        self.name_index = NameIndex()
+        self.state_ready = False
+    
+    def color(self, name):
+        """Couleur d'embed définie dans config.json"""
+        return discord.Color(int(self.config['color'][name].lstrip('#'), 16))
     
     def load_birthdays(self):
         """Charge les anniversaires depuis le fichier JSON"""
@@ -53,6 +190,79 @@ class BirthdayCommands(commands.Cog):
         except:
             return 'Utilisateur inconnu'
     
+    def resolve_names(self, user_id, info):
+        """Pseudo du serveur (si le membre est en cache) et nom enregistré"""
+        display_name = None
+        for guild in self.bot.guilds:
+            member = guild.get_member(int(user_id))
+            if member:
+                display_name = member.display_name
+                break
+        return (display_name, info.get('username'))
+    
+    def rebuild_state(self):
+        """Construit l'index des noms (le cache des membres doit être rempli)"""
+        birthdays = self.load_birthdays().get('birthdays', {})
+        self.name_index.rebuild({
+            user_id: self.resolve_names(user_id, info)
+            for user_id, info in birthdays.items()
+        })
+        self.state_ready = True
+    
+    def snapshot_state(self):
+        """État dérivé à sauvegarder dans le snapshot de démarrage"""
+        return {'name_index': self.name_index.export()}
+    
+    def restore_state(self, state):
+        """Restaure l'état dérivé depuis le snapshot de démarrage
+        
+        Retourne True si des pseudos ont changé depuis l'écriture du snapshot.
+        """
+        self.name_index.load(state['name_index'])
+        self.state_ready = True
+        return self.refresh_display_names() > 0
+    
+    def refresh_display_names(self):
+        """Met à jour les pseudos modifiés pendant que le bot était hors ligne"""
+        changed = 0
+        for user_id, names in list(self.name_index.names.items()):
+            current = self.resolve_names(user_id, {'username': names[1]})
+            if current != names:
+                self.name_index.add(user_id, current)
+                changed += 1
+        if changed:
+            print(f"🔄 {changed} pseudo(s) mis à jour depuis le snapshot")
+        return changed
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Construit l'index des noms si le cog WarmStart n'est pas chargé"""
+        if not self.state_ready and not self.bot.get_cog('WarmStart'):
+            self.rebuild_state()
+    
+    @commands.Cog.listener()
+    async def on_birthday_update(self, user_id, before, after):
+        """Met à jour l'index des noms quand un anniversaire change"""
+        if after:
+            self.name_index.add(user_id, self.resolve_names(user_id, after))
+        else:
+            self.name_index.remove(user_id)
+    
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Met à jour l'index quand un membre change de pseudo"""
+        user_id = str(after.id)
+        names = self.name_index.names.get(user_id)
+        if names is not None and before.display_name != after.display_name:
+            self.name_index.add(user_id, (after.display_name, names[1]))
+    
+    @commands.Cog.listener()
+    async def on_config_update(self, config):
+        """Applique la nouvelle configuration sans recharger le cog"""
+        self.config = config
+        self.months_fr = config['months_fr']
+        self.emojis = config['emojis']
+    
     @slash_command(
         name="anniv_set",
         description="Enregistrer votre anniversaire"
@@ -81,6 +291,7 @@ class BirthdayCommands(commands.Cog):
         user_id = str(ctx.author.id)
         
         # Enregistrement
+        before = data['birthdays'].get(user_id)
         data['birthdays'][user_id] = {
             'username': ctx.author.name,
             'day': jour,
@@ -90,6 +301,9 @@ class BirthdayCommands(commands.Cog):
         
         self.save_birthdays(data)
         
+        # Notifie les autres cogs (index, rappels...) du changement
+        self.bot.dispatch('birthday_update', user_id, before, data['birthdays'][user_id])
+        
         # Message de confirmation
         date_str = f"{jour:02d}/{mois:02d}"
         if annee:
@@ -98,7 +312,7 @@ class BirthdayCommands(commands.Cog):
         embed = discord.Embed(
             title=f"{self.emojis['cake']} Anniversaire enregistré!",
             description=f"Votre anniversaire a été enregistré pour le **{date_str}**",
-            color=discord.Color.from_rgb(255, 105, 180)
+            color=self.color('primary')
         )
         
         await ctx.respond(embed=embed, ephemeral=True)
@@ -132,7 +346,7 @@ class BirthdayCommands(commands.Cog):
         # Création de l'embed
         embed = discord.Embed(
             title=f"{self.emojis['party']} Liste des anniversaires des membres du KCS2",
-            color=discord.Color.from_rgb(255, 105, 180)
+            color=self.color('primary')
         )
         
         # Ajout d'une image/icône (optionnel)
@@ -211,7 +425,7 @@ class BirthdayCommands(commands.Cog):
         # Affichage des 5 prochains
         embed = discord.Embed(
             title=f"{self.emojis['balloon']} Prochains anniversaires",
-            color=discord.Color.from_rgb(52, 152, 219)
+            color=self.color('info')
         )
         
         for i, bday in enumerate(upcoming[:5]):
@@ -233,17 +447,55 @@ class BirthdayCommands(commands.Cog):
     async def get_birthday(
         self,
         ctx,
-        membre: Option(discord.Member, "Membre à consulter", required=False)
+        membre: Option(discord.Member, "Membre à consulter", required=False),
+        nom: Option(str, "Rechercher par nom (membres partis inclus)", autocomplete=search_birthdays, required=False)
     ):
         """Affiche l'anniversaire d'un membre spécifique"""
         
-        target = membre if membre else ctx.author
+        if membre and nom:
+            await ctx.respond("❌ Utilisez soit `membre`, soit `nom`, pas les deux.", ephemeral=True)
+            return
+        
         data = self.load_birthdays()
         
-        user_id = str(target.id)
+        if nom:
+            # Valeur choisie dans l'autocomplétion (user_id) ou texte libre
+            if nom in data['birthdays']:
+                user_id = nom
+            else:
+                candidates = self.name_index.search(nom, limit=10)
+                query = self.name_index.normalize(nom)
+                exact = [
+                    candidate for candidate in candidates
+                    if any(self.name_index.normalize(name) == query for name in filter(None, self.name_index.names[candidate]))
+                ]
+                
+                if not candidates:
+                    await ctx.respond(f"❌ Aucun anniversaire trouvé pour **{nom}**", ephemeral=True)
+                    return
+                
+                # Pas de correspondance exacte unique : on propose les candidats plutôt que de deviner
+                if len(exact) != 1:
+                    if exact:
+                        header = f"🔎 Plusieurs membres correspondent à **{nom}** :"
+                    else:
+                        header = f"🔎 Aucune correspondance exacte pour **{nom}**, résultats proches :"
+                    choices = "\n".join(f"• {self.name_index.label(candidate)}" for candidate in (exact or candidates))
+                    await ctx.respond(
+                        f"{header}\n{choices}\n\n💡 Choisissez un nom dans la liste d'autocomplétion.",
+                        ephemeral=True
+                    )
+                    return
+                user_id = exact[0]
+            target = ctx.guild.get_member(int(user_id)) if ctx.guild else None
+        else:
+            target = membre if membre else ctx.author
+            user_id = str(target.id)
+        
+        mention = target.mention if target else f"<@{user_id}>"
         if user_id not in data['birthdays']:
             await ctx.respond(
-                f"❌ Aucun anniversaire enregistré pour {target.mention}",
+                f"❌ Aucun anniversaire enregistré pour {mention}",
                 ephemeral=True
             )
             return
@@ -257,12 +509,14 @@ class BirthdayCommands(commands.Cog):
         else:
             age_text = ""
         
+        name = target.name if target else info.get('username', 'Utilisateur inconnu')
         embed = discord.Embed(
-            title=f"{self.emojis['cake']} Anniversaire de {target.name}",
+            title=f"{self.emojis['cake']} Anniversaire de {name}",
             description=f"📅 Date: **{date_str}**{age_text}",
-            color=discord.Color.from_rgb(255, 105, 180)
+            color=self.color('primary')
         )
-        embed.set_thumbnail(url=target.display_avatar.url)
+        if target:
+            embed.set_thumbnail(url=target.display_avatar.url)
         
         await ctx.respond(embed=embed)
     
@@ -296,8 +550,9 @@ class BirthdayCommands(commands.Cog):
             )
             return
         
-        del data['birthdays'][user_id]
+        before = data['birthdays'].pop(user_id)
         self.save_birthdays(data)
+        self.bot.dispatch('birthday_update', user_id, before, None)
         
         await ctx.respond(
             f"✅ Anniversaire de {membre.mention} supprimé.",
@@ -396,7 +651,7 @@ class BirthdayCommands(commands.Cog):
         # Message de résultat
         embed = discord.Embed(
             title=f"{self.emojis['party']} Création d'événements terminée",
-            color=discord.Color.from_rgb(52, 152, 219)
+            color=self.color('info')
         )
         
         embed.add_field(
@@ -482,7 +737,7 @@ class BirthdayCommands(commands.Cog):
             # Message de résultat
             embed = discord.Embed(
                 title=f"🗑️ Suppression d'événements terminée",
-                color=discord.Color.from_rgb(231, 76, 60) if failed_count > 0 else discord.Color.from_rgb(46, 204, 113)
+                color=self.color('error') if failed_count > 0 else self.color('success')
             )
             
             embed.add_field(
@@ -0,0 +1,422 @@
+"""
+Module des rappels d'anniversaires (DM avant la date et récapitulatif hebdomadaire)
+"""
+
+import discord
+from discord.ext import commands, tasks
+from discord.commands import slash_command, Option
+import asyncio
+import heapq
+import itertools
+import json
+from datetime import datetime, timedelta
+import os
+
+# Paramètres de l'envoi des rappels
+REMINDER_MAX_DAYS = 30        # nombre de jours maximal avant l'anniversaire
+REMINDER_BATCH_SIZE = 5       # DM envoyés simultanément
+REMINDER_BATCH_DELAY = 1.5    # pause (secondes) entre deux lots pour respecter les rate limits
+REMINDER_MAX_SLEEP = 3600     # réveil de sécurité (secondes) en cas de dérive d'horloge
+DIGEST_DAYS = 7               # période couverte par le récapitulatif hebdomadaire
+
+class BirthdayReminders(commands.Cog):
+    """Rappels d'anniversaires planifiés sur un tas (heap) d'échéances"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.data_file = 'data/birthdays.json'
+        self.reminders_file = 'data/reminders.json'
+        
+        # Chargement de la configuration
+        with open('config.json', 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        
+        self.emojis = self.config['emojis']
+        self.check_hour = int(os.getenv('CHECK_HOUR', 9))
+        self.check_minute = int(os.getenv('CHECK_MINUTE', 0))
+        self.digest_weekday = int(os.getenv('DIGEST_WEEKDAY', 0))  # 0 = lundi
+        
+        # Échéancier : (date de déclenchement, compteur, type, données)
+        self.heap = []
+        self.scheduled = set()
+        self.counter = itertools.count()
+        self.wake = asyncio.Event()
+        
+        # Copie en mémoire des anniversaires et index par date, restaurés par le
+        # cog WarmStart ou construits au on_ready
+        self.birthdays = {}
+        self.by_date = {}
+        self.state_ready = False
+        
+        self.subscriptions = self.load_reminders().get('subscriptions', {})
+        self.by_days = {}
+        for subscriber_id, sub in self.subscriptions.items():
+            self.by_days.setdefault(sub['days'], set()).add(subscriber_id)
+        
+        self.run_reminders.start()
+    
+    def cog_unload(self):
+        """Arrêt de l'échéancier lors du déchargement du cog"""
+        self.run_reminders.cancel()
+    
+    def color(self, name):
+        """Couleur d'embed définie dans config.json"""
+        return discord.Color(int(self.config['color'][name].lstrip('#'), 16))
+    
+    def load_birthdays(self):
+        """Charge les anniversaires depuis le fichier JSON"""
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"birthdays": {}}
+    
+    def load_reminders(self):
+        """Charge les abonnements aux rappels depuis le fichier JSON"""
+        try:
+            with open(self.reminders_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"subscriptions": {}}
+    
+    def save_reminders(self):
+        """Sauvegarde les abonnements aux rappels dans le fichier JSON"""
+        with open(self.reminders_file, 'w', encoding='utf-8') as f:
+            json.dump({"subscriptions": self.subscriptions}, f, indent=2, ensure_ascii=False)
+    
+    def get_display_name(self, guild, user_id):
+        """Récupère le pseudo du serveur ou le nom d'utilisateur"""
+        member = guild.get_member(int(user_id)) if guild else None
+        if member:
+            return member.display_name
+        return self.birthdays.get(str(user_id), {}).get('username', 'Utilisateur inconnu')
+    
+    def next_reminder_time(self, month, day, days, now):
+        """Calcule la prochaine date de rappel `days` jours avant l'anniversaire"""
+        for year in range(now.year, now.year + 5):
+            try:
+                bday = datetime(year, month, day, self.check_hour, self.check_minute)
+            except ValueError:
+                continue  # 29 février hors année bissextile
+            fire_at = bday - timedelta(days=days)
+            if fire_at > now:
+                return fire_at
+        return None
+    
+    def next_digest_time(self, now):
+        """Calcule la date du prochain récapitulatif hebdomadaire"""
+        fire_at = now.replace(hour=self.check_hour, minute=self.check_minute, second=0, microsecond=0)
+        fire_at += timedelta(days=(self.digest_weekday - fire_at.weekday()) % 7)
+        if fire_at <= now:
+            fire_at += timedelta(days=7)
+        return fire_at
+    
+    def push(self, fire_at, kind, payload):
+        """Ajoute une échéance au tas (sans doublon) et réveille l'échéancier si besoin"""
+        if fire_at is None:
+            return
+        key = (kind, payload, fire_at)
+        if key in self.scheduled:
+            return
+        self.scheduled.add(key)
+        heapq.heappush(self.heap, (fire_at, next(self.counter), kind, payload))
+        if self.heap[0][0] == fire_at:
+            self.wake.set()
+    
+    def schedule_birthday(self, user_id, info, now, days_list=None):
+        """Planifie les rappels d'un anniversaire pour chaque délai demandé"""
+        for days in (days_list if days_list is not None else self.by_days):
+            fire_at = self.next_reminder_time(info['month'], info['day'], days, now)
+            self.push(fire_at, 'dm', (user_id, info['month'], info['day'], days))
+    
+    def build_schedule(self):
+        """Construit l'échéancier complet à partir du calendrier"""
+        now = datetime.now()
+        self.heap = []
+        self.scheduled = set()
+        
+        if self.by_days:
+            for user_id, info in self.birthdays.items():
+                self.schedule_birthday(user_id, info, now)
+        
+        if os.getenv('BIRTHDAY_CHANNEL_ID'):
+            self.push(self.next_digest_time(now), 'digest', None)
+    
+    def rebuild_state(self):
+        """Construit le calendrier et l'échéancier à partir du fichier"""
+        self.birthdays = self.load_birthdays().get('birthdays', {})
+        self.by_date = {}
+        for user_id, info in self.birthdays.items():
+            self.by_date.setdefault((info['month'], info['day']), set()).add(user_id)
+        
+        self.build_schedule()
+        self.state_ready = True
+    
+    def snapshot_state(self):
+        """Calendrier et échéancier à sauvegarder dans le snapshot de démarrage"""
+        return {
+            'birthdays': self.birthdays,
+            'by_date': self.by_date,
+            'heap': [(fire_at.timestamp(), kind, payload) for fire_at, _, kind, payload in self.heap],
+            'days': list(self.by_days)
+        }
+    
+    def restore_state(self, state):
+        """Restaure le calendrier et l'échéancier depuis le snapshot de démarrage"""
+        self.birthdays = state['birthdays']
+        self.by_date = state['by_date']
+        self.heap = []
+        self.scheduled = set()
+        
+        now = datetime.now()
+        has_digest = False
+        for timestamp, kind, payload in state['heap']:
+            fire_at = datetime.fromtimestamp(timestamp)
+            if kind == 'digest':
+                has_digest = True
+                self.push(fire_at if fire_at > now else self.next_digest_time(now), kind, payload)
+            elif fire_at > now:
+                self.push(fire_at, kind, payload)
+            else:
+                # Échéance passée pendant l'arrêt du bot : replanification à l'année suivante
+                user_id, month, day, days = payload
+                info = self.birthdays.get(user_id)
+                if info and (info['month'], info['day']) == (month, day):
+                    self.schedule_birthday(user_id, info, now, [days])
+        
+        # Délais ajoutés dans reminders.json depuis l'écriture du snapshot
+        for days in set(self.by_days) - set(state['days']):
+            for user_id, info in self.birthdays.items():
+                self.schedule_birthday(user_id, info, now, [days])
+        
+        if not has_digest and os.getenv('BIRTHDAY_CHANNEL_ID'):
+            self.push(self.next_digest_time(now), 'digest', None)
+        
+        self.state_ready = True
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Construit le calendrier si le cog WarmStart n'est pas chargé"""
+        if not self.state_ready and not self.bot.get_cog('WarmStart'):
+            self.rebuild_state()
+    
+    @tasks.loop()
+    async def run_reminders(self):
+        """Attend la prochaine échéance du tas puis déclenche les rappels dus"""
+        
+        if not self.heap:
+            await self.wake.wait()
+            self.wake.clear()
+            return
+        
+        delay = (self.heap[0][0] - datetime.now()).total_seconds()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=min(delay, REMINDER_MAX_SLEEP))
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            return
+        
+        # Récupération de toutes les échéances arrivées à terme
+        now = datetime.now()
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            fire_at, _, kind, payload = heapq.heappop(self.heap)
+            self.scheduled.discard((kind, payload, fire_at))
+            due.append((kind, payload))
+        
+        reminders = [payload for kind, payload in due if kind == 'dm']
+        if reminders:
+            await self.send_reminders(reminders, now)
+        
+        if any(kind == 'digest' for kind, _ in due):
+            await self.send_digest(now)
+            self.push(self.next_digest_time(now), 'digest', None)
+    
+    @run_reminders.before_loop
+    async def before_run_reminders(self):
+        """Attend que le bot soit prêt avant de lancer l'échéancier"""
+        await self.bot.wait_until_ready()
+    
+    async def send_reminders(self, reminders, now):
+        """Regroupe les rappels par abonné et les envoie en DM par lots"""
+        
+        guild_id = os.getenv('GUILD_ID')
+        guild = self.bot.get_guild(int(guild_id)) if guild_id else None
+        messages = {}
+        
+        for user_id, month, day, days in reminders:
+            # Échéance obsolète : anniversaire modifié/supprimé ou plus d'abonné pour ce délai
+            info = self.birthdays.get(user_id)
+            if not info or (info['month'], info['day']) != (month, day):
+                continue
+            subscribers = self.by_days.get(days)
+            if not subscribers:
+                continue
+            
+            name = self.get_display_name(guild, user_id)
+            for subscriber_id in subscribers:
+                members = self.subscriptions[subscriber_id]['members']
+                if subscriber_id == user_id or (members and user_id not in members):
+                    continue
+                messages.setdefault(subscriber_id, []).append(
+                    f"• **{name}** le {day:02d}/{month:02d} (dans {days} jour(s))"
+                )
+            
+            # Replanification pour l'année suivante
+            self.schedule_birthday(user_id, info, now, [days])
+        
+        items = list(messages.items())
+        for i in range(0, len(items), REMINDER_BATCH_SIZE):
+            batch = items[i:i + REMINDER_BATCH_SIZE]
+            await asyncio.gather(*(self.send_dm(subscriber_id, lines) for subscriber_id, lines in batch))
+            if i + REMINDER_BATCH_SIZE < len(items):
+                await asyncio.sleep(REMINDER_BATCH_DELAY)
+        
+        if items:
+            print(f"🔔 {len(items)} rappel(s) d'anniversaire envoyé(s) en DM")
+    
+    async def send_dm(self, subscriber_id, lines):
+        """Envoie un rappel en message privé à un abonné"""
+        try:
+            user = self.bot.get_user(int(subscriber_id)) or await self.bot.fetch_user(int(subscriber_id))
+            embed = discord.Embed(
+                title=f"{self.emojis['balloon']} Rappel d'anniversaire",
+                description="\n".join(lines),
+                color=self.color('info')
+            )
+            embed.set_footer(text="💡 /anniv_rappel_stop pour ne plus recevoir ces rappels")
+            await user.send(embed=embed)
+        except discord.Forbidden:
+            print(f"⚠️ DM refusés par {subscriber_id}")
+        except discord.HTTPException as e:
+            print(f"❌ Erreur lors de l'envoi du rappel à {subscriber_id}: {e}")
+    
+    async def send_digest(self, now):
+        """Publie dans le canal les anniversaires des 7 prochains jours"""
+        
+        channel_id = os.getenv('BIRTHDAY_CHANNEL_ID')
+        channel = self.bot.get_channel(int(channel_id)) if channel_id else None
+        if not channel:
+            print(f"❌ Canal {channel_id} introuvable pour le récapitulatif")
+            return
+        
+        lines = []
+        for offset in range(DIGEST_DAYS):
+            date = now + timedelta(days=offset)
+            for user_id in sorted(self.by_date.get((date.month, date.day), ())):
+                name = self.get_display_name(channel.guild, user_id)
+                lines.append(f"📅 {date.day:02d}/{date.month:02d} - **{name}**")
+        
+        if not lines:
+            return
+        
+        embed = discord.Embed(
+            title=f"{self.emojis['party']} Anniversaires de la semaine",
+            description="\n".join(lines[:50]),
+            color=self.color('info')
+        )
+        if len(lines) > 50:
+            embed.set_footer(text=f"... et {len(lines) - 50} autre(s) anniversaire(s)")
+        
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            print(f"❌ Erreur lors de l'envoi du récapitulatif: {e}")
+    
+    @commands.Cog.listener()
+    async def on_config_update(self, config):
+        """Applique la nouvelle configuration sans recharger le cog"""
+        self.config = config
+        self.emojis = config['emojis']
+    
+    @commands.Cog.listener()
+    async def on_birthday_update(self, user_id, before, after):
+        """Met à jour l'index et l'échéancier quand un anniversaire change"""
+        
+        # L'état précédent connu du cog fait foi : l'événement peut être reçu deux fois
+        before = self.birthdays.get(user_id)
+        if before:
+            members = self.by_date.get((before['month'], before['day']))
+            if members:
+                members.discard(user_id)
+        
+        if after:
+            self.birthdays[user_id] = after
+            self.by_date.setdefault((after['month'], after['day']), set()).add(user_id)
+            # Les anciennes échéances sont ignorées au déclenchement (date différente)
+            self.schedule_birthday(user_id, after, datetime.now())
+        else:
+            self.birthdays.pop(user_id, None)
+    
+    @slash_command(
+        name="anniv_rappel",
+        description="Recevoir un rappel en DM avant les anniversaires"
+    )
+    async def subscribe(
+        self,
+        ctx,
+        jours: Option(int, "Nombre de jours avant l'anniversaire", min_value=1, max_value=REMINDER_MAX_DAYS, required=True),
+        membre: Option(discord.Member, "Membre à suivre (tous si vide)", required=False)
+    ):
+        """Abonne l'utilisateur aux rappels d'anniversaires"""
+        
+        subscriber_id = str(ctx.author.id)
+        sub = self.subscriptions.get(subscriber_id, {'days': jours, 'members': []})
+        
+        # Changement de délai : retrait de l'ancien index
+        if subscriber_id in self.subscriptions and sub['days'] != jours:
+            self.by_days[sub['days']].discard(subscriber_id)
+            if not self.by_days[sub['days']]:
+                del self.by_days[sub['days']]
+        
+        sub['days'] = jours
+        if membre:
+            if str(membre.id) not in sub['members']:
+                sub['members'].append(str(membre.id))
+        else:
+            sub['members'] = []
+        
+        self.subscriptions[subscriber_id] = sub
+        self.save_reminders()
+        
+        # Nouveau délai : planification de tous les anniversaires pour ce délai
+        new_days = jours not in self.by_days
+        self.by_days.setdefault(jours, set()).add(subscriber_id)
+        if new_days:
+            now = datetime.now()
+            for user_id, info in self.birthdays.items():
+                self.schedule_birthday(user_id, info, now, [jours])
+        
+        target = ", ".join(f"<@{member_id}>" for member_id in sub['members']) if sub['members'] else "tous les membres"
+        await ctx.respond(
+            f"🔔 Vous recevrez un rappel **{jours} jour(s)** avant l'anniversaire de {target}.",
+            ephemeral=True
+        )
+    
+    @slash_command(
+        name="anniv_rappel_stop",
+        description="Ne plus recevoir de rappels d'anniversaires"
+    )
+    async def unsubscribe(self, ctx):
+        """Désabonne l'utilisateur des rappels d'anniversaires"""
+        
+        subscriber_id = str(ctx.author.id)
+        sub = self.subscriptions.pop(subscriber_id, None)
+        
+        if not sub:
+            await ctx.respond("❌ Vous n'êtes abonné à aucun rappel.", ephemeral=True)
+            return
+        
+        self.save_reminders()
+        
+        # Les échéances sans abonné seront ignorées au déclenchement
+        self.by_days[sub['days']].discard(subscriber_id)
+        if not self.by_days[sub['days']]:
+            del self.by_days[sub['days']]
+        
+        await ctx.respond("🔕 Vous ne recevrez plus de rappels d'anniversaires.", ephemeral=True)
+
+def setup(bot):
+    bot.add_cog(BirthdayReminders(bot))
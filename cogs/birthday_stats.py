@@ -0,0 +1,167 @@
+"""
+Module des statistiques d'anniversaires
+"""
+
+import discord
+from discord.ext import commands
+from discord.commands import slash_command
+from collections import Counter
+import json
+from datetime import datetime
+
+class BirthdayStats(commands.Cog):
+    """Statistiques d'anniversaires maintenues de façon incrémentale"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.data_file = 'data/birthdays.json'
+        
+        # Chargement de la configuration
+        with open('config.json', 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        
+        self.months_fr = self.config['months_fr']
+        self.emojis = self.config['emojis']
+        
+        # Compteurs restaurés par le cog WarmStart ou construits au on_ready
+        self.records = {}
+        self.per_month = Counter()
+        self.per_day = Counter()
+        self.years = Counter()
+        self.state_ready = False
+    
+    def color(self, name):
+        """Couleur d'embed définie dans config.json"""
+        return discord.Color(int(self.config['color'][name].lstrip('#'), 16))
+    
+    def load_birthdays(self):
+        """Charge les anniversaires depuis le fichier JSON"""
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"birthdays": {}}
+    
+    def rebuild_state(self):
+        """Recalcule tous les compteurs à partir du fichier (rechargement complet)"""
+        self.records = {}
+        self.per_month = Counter()
+        self.per_day = Counter()
+        self.years = Counter()
+        
+        for user_id, info in self.load_birthdays().get('birthdays', {}).items():
+            self.add_record(user_id, info)
+        self.state_ready = True
+    
+    def snapshot_state(self):
+        """Compteurs à sauvegarder dans le snapshot de démarrage"""
+        return {
+            'records': self.records,
+            'per_month': dict(self.per_month),
+            'per_day': dict(self.per_day),
+            'years': dict(self.years)
+        }
+    
+    def restore_state(self, state):
+        """Restaure les compteurs depuis le snapshot de démarrage"""
+        self.records = state['records']
+        self.per_month = Counter(state['per_month'])
+        self.per_day = Counter(state['per_day'])
+        self.years = Counter(state['years'])
+        self.state_ready = True
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Construit les compteurs si le cog WarmStart n'est pas chargé"""
+        if not self.state_ready and not self.bot.get_cog('WarmStart'):
+            self.rebuild_state()
+    
+    def add_record(self, user_id, info):
+        """Ajoute un anniversaire aux compteurs"""
+        record = (info['month'], info['day'], info.get('year'))
+        self.records[user_id] = record
+        self.per_month[record[0]] += 1
+        self.per_day[(record[0], record[1])] += 1
+        if record[2]:
+            self.years[record[2]] += 1
+    
+    def remove_record(self, user_id):
+        """Retire un anniversaire des compteurs"""
+        record = self.records.pop(user_id, None)
+        if not record:
+            return
+        self.per_month[record[0]] -= 1
+        self.per_day[(record[0], record[1])] -= 1
+        if record[2]:
+            self.years[record[2]] -= 1
+    
+    @commands.Cog.listener()
+    async def on_birthday_update(self, user_id, before, after):
+        """Met à jour les compteurs en O(1) quand un anniversaire change"""
+        # L'état connu du cog fait foi : l'événement peut être reçu deux fois
+        self.remove_record(user_id)
+        if after:
+            self.add_record(user_id, after)
+    
+    @commands.Cog.listener()
+    async def on_config_update(self, config):
+        """Applique la nouvelle configuration sans recharger le cog"""
+        self.config = config
+        self.months_fr = config['months_fr']
+        self.emojis = config['emojis']
+    
+    @slash_command(
+        name="anniv_stats",
+        description="Afficher les statistiques des anniversaires"
+    )
+    async def show_stats(self, ctx):
+        """Affiche les statistiques à partir des compteurs en mémoire"""
+        
+        total = len(self.records)
+        if not total:
+            await ctx.respond("📭 Aucun anniversaire enregistré.", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title=f"{self.emojis['party']} Statistiques des anniversaires",
+            color=self.color('info')
+        )
+        
+        # Nombre d'inscrits
+        with_year = sum(self.years.values())
+        embed.add_field(
+            name="👥 Inscrits",
+            value=f"**{total}** anniversaire(s)\n{with_year} avec année de naissance",
+            inline=True
+        )
+        
+        # Âge moyen (calculé comme dans /anniv_get)
+        if with_year:
+            current_year = datetime.now().year
+            average_age = sum((current_year - year) * count for year, count in self.years.items()) / with_year
+            embed.add_field(name="🎂 Âge moyen", value=f"**{average_age:.1f}** ans", inline=True)
+        
+        # Jour(s) le(s) plus chargé(s)
+        busiest = max(self.per_day.values())
+        busiest_days = sorted(day for day, count in self.per_day.items() if count == busiest)
+        days_text = ", ".join(f"{day:02d}/{month:02d}" for month, day in busiest_days[:5])
+        embed.add_field(
+            name="📅 Jour le plus chargé",
+            value=f"**{days_text}** ({busiest} anniversaire(s))",
+            inline=True
+        )
+        
+        # Répartition par mois
+        max_month = max(self.per_month.values())
+        months_text = ""
+        for month in range(1, 13):
+            count = self.per_month[month]
+            bar = "█" * round(count * 10 / max_month) if count else ""
+            months_text += f"`{self.months_fr[str(month)]:<10} {bar:<10} {count}`\n"
+        
+        embed.add_field(name="**Par mois:**", value=months_text, inline=False)
+        
+        await ctx.respond(embed=embed)
+
+def setup(bot):
+    bot.add_cog(BirthdayStats(bot))
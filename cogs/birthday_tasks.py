@@ -5,16 +5,27 @@ Module des tâches automatiques pour les anniversaires
 import discord
 from discord import ScheduledEventLocation
 from discord.ext import commands, tasks
+import aiohttp
+import asyncio
 import json
 from datetime import datetime, timedelta
 import os
 
+# Paramètres de l'outbox (file d'envoi persistante)
+OUTBOX_INTERVAL = 30          # secondes entre deux passages du worker
+OUTBOX_MAX_ATTEMPTS = 5       # tentatives avant abandon d'une tâche
+OUTBOX_BACKOFF_BASE = 30      # délai initial (secondes) avant nouvelle tentative
+OUTBOX_BACKOFF_MAX = 1800     # délai maximal (secondes) entre deux tentatives
+OUTBOX_RETENTION_DAYS = 7     # conservation des tâches terminées (déduplication)
+
 class BirthdayTasks(commands.Cog):
     """Tâches automatiques pour les anniversaires"""
     
     def __init__(self, bot):
         self.bot = bot
         self.data_file = 'data/birthdays.json'
+        self.outbox_file = 'data/outbox.json'
+        self.outbox_lock = asyncio.Lock()
         
         # Chargement de la configuration
         with open('config.json', 'r', encoding='utf-8') as f:
@@ -22,12 +33,18 @@ class BirthdayTasks(commands.Cog):
         
         self.emojis = self.config['emojis']
         
-        # Démarrage de la tâche de vérification
+        # Démarrage des tâches de vérification et d'envoi
         self.check_birthdays.start()
+        self.deliver_outbox.start()
     
     def cog_unload(self):
-        """Arrêt de la tâche lors du déchargement du cog"""
+        """Arrêt des tâches lors du déchargement du cog"""
         self.check_birthdays.cancel()
+        self.deliver_outbox.cancel()
+    
+    def color(self, name):
+        """Couleur d'embed définie dans config.json"""
+        return discord.Color(int(self.config['color'][name].lstrip('#'), 16))
     
     def load_birthdays(self):
         """Charge les anniversaires depuis le fichier JSON"""
@@ -51,69 +68,254 @@ class BirthdayTasks(commands.Cog):
         except:
             return 'Utilisateur inconnu'
     
-    @tasks.loop(hours=24)
-    async def check_birthdays(self):
-        """Vérifie quotidiennement les anniversaires et envoie des messages"""
-        
-        # Attendre que le bot soit prêt
-        await self.bot.wait_until_ready()
+    @commands.Cog.listener()
+    async def on_config_update(self, config):
+        """Applique la nouvelle configuration sans recharger le cog"""
+        self.config = config
+        self.emojis = config['emojis']
+    
+    def load_outbox(self):
+        """Charge la file d'envoi (outbox) depuis le fichier JSON"""
+        try:
+            with open(self.outbox_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"jobs": {}}
+    
+    def save_outbox(self, outbox):
+        """Sauvegarde la file d'envoi de façon atomique (fichier temporaire + remplacement)"""
+        tmp_file = f"{self.outbox_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(outbox, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.outbox_file)
+    
+    async def plan_birthdays(self, today=None):
+        """Enregistre dans l'outbox les annonces et événements du jour (clé guild:user:date)"""
         
-        today = datetime.now()
+        today = today or datetime.now()
         data = self.load_birthdays()
         birthdays = data.get('birthdays', {})
         
         # Recherche des anniversaires du jour
-        today_birthdays = []
-        for user_id, info in birthdays.items():
-            if info['day'] == today.day and info['month'] == today.month:
-                today_birthdays.append({
-                    'user_id': user_id,
-                    'username': info['username'],
-                    'year': info.get('year')
-                })
+        today_birthdays = [
+            user_id for user_id, info in birthdays.items()
+            if info['day'] == today.day and info['month'] == today.month
+        ]
         
         if not today_birthdays:
-            return
+            return 0
         
         # Récupération du canal d'annonces
         channel_id = os.getenv('BIRTHDAY_CHANNEL_ID')
         if not channel_id:
             print("⚠️ BIRTHDAY_CHANNEL_ID non configuré dans .env")
-            return
+            return 0
         
         channel = self.bot.get_channel(int(channel_id))
         if not channel:
             print(f"❌ Canal {channel_id} introuvable")
-            return
+            return 0
         
-        # Envoi des messages d'anniversaire
-        for bday in today_birthdays:
-            user = await self.bot.fetch_user(int(bday['user_id']))
-            
-            # Récupère le pseudo du serveur
-            guild = channel.guild
-            display_name = self.get_display_name(guild, bday['user_id'])
+        # Le verrou évite qu'un passage du worker n'écrase les tâches planifiées
+        async with self.outbox_lock:
+            outbox = self.load_outbox()
+            jobs = outbox['jobs']
+            date_str = today.strftime('%Y-%m-%d')
+            now_str = datetime.now().isoformat()
+            planned = 0
             
-            # Calcul de l'âge si disponible
-            age_text = ""
-            if bday['year']:
-                age = today.year - bday['year']
-                age_text = f" qui fête ses **{age} ans**"
+            for user_id in today_birthdays:
+                for kind in ('announce', 'event'):
+                    key = f"{channel.guild.id}:{user_id}:{date_str}:{kind}"
+                    
+                    # Déduplication : une seule tâche par (serveur, membre, jour)
+                    if key in jobs:
+                        continue
+                    
+                    jobs[key] = {
+                        'kind': kind,
+                        'guild_id': channel.guild.id,
+                        'channel_id': channel.id,
+                        'user_id': user_id,
+                        'date': date_str,
+                        'status': 'pending',
+                        'attempts': 0,
+                        'created_at': now_str,
+                        'next_attempt': now_str,
+                        'last_error': None
+                    }
+                    planned += 1
             
-            embed = discord.Embed(
-                title=f"{self.emojis['party']} Joyeux Anniversaire! {self.emojis['cake']}",
-                description=f"Aujourd'hui c'est l'anniversaire de {user.mention}{age_text}!\n\n"
-                           f"{self.emojis['gift']} Souhaitons-lui un excellent anniversaire! {self.emojis['balloon']}",
-                color=discord.Color.from_rgb(255, 105, 180)
-            )
-            
-            embed.set_thumbnail(url=user.display_avatar.url)
-            embed.set_footer(text=f"🎊 Bon anniversaire {display_name}! 🎊")
+            if planned:
+                self.save_outbox(outbox)
+                print(f"📬 {planned} tâche(s) ajoutée(s) à l'outbox pour le {date_str}")
+        
+        return planned
+    
+    @tasks.loop(hours=24)
+    async def check_birthdays(self):
+        """Planifie quotidiennement les messages d'anniversaire puis vide l'outbox"""
+        
+        # Attendre que le bot soit prêt
+        await self.bot.wait_until_ready()
+        
+        if await self.plan_birthdays():
+            await self.drain_outbox()
+    
+    @tasks.loop(seconds=OUTBOX_INTERVAL)
+    async def deliver_outbox(self):
+        """Vide régulièrement l'outbox (reprise après crash et nouvelles tentatives)"""
+        await self.drain_outbox()
+    
+    @deliver_outbox.before_loop
+    async def before_deliver_outbox(self):
+        """Attend que le bot soit prêt avant de traiter l'outbox"""
+        await self.bot.wait_until_ready()
+    
+    async def drain_outbox(self):
+        """Envoie toutes les tâches en attente dont l'échéance est passée"""
+        
+        async with self.outbox_lock:
+            outbox = self.load_outbox()
+            jobs = outbox['jobs']
+            now = datetime.now()
+            today_str = now.strftime('%Y-%m-%d')
             
-            await channel.send(embed=embed)
+            for key, job in jobs.items():
+                if job['status'] not in ('pending', 'sending'):
+                    continue
+                
+                # Une annonce ne part que le jour même
+                if job['date'] != today_str:
+                    job['status'] = 'expired'
+                    self.save_outbox(outbox)
+                    continue
+                
+                if datetime.fromisoformat(job['next_attempt']) > now:
+                    continue
+                
+                job['status'] = 'sending'
+                job['attempts'] += 1
+                self.save_outbox(outbox)
+                
+                try:
+                    if job['kind'] == 'announce':
+                        await self.deliver_announcement(job)
+                    else:
+                        await self.create_birthday_event(job['user_id'], job, self.bot.get_guild(job['guild_id']))
+                    job['status'] = 'sent'
+                    job['sent_at'] = datetime.now().isoformat()
+                except discord.HTTPException as e:
+                    # Rate limit (429) et erreurs serveur (5xx) : temporaires
+                    if e.status == 429 or e.status >= 500:
+                        self.retry_job(key, job, e)
+                    else:
+                        self.fail_job(key, job, e)
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    # Erreur réseau : temporaire
+                    self.retry_job(key, job, e)
+                except Exception as e:
+                    # Erreur de données ou de programmation (ValueError, KeyError...) : définitive
+                    self.fail_job(key, job, e)
+                
+                self.save_outbox(outbox)
             
-            # Création d'un événement Discord (optionnel)
-            await self.create_birthday_event(user, bday, guild)
+            self.purge_outbox(outbox, now)
+            self.report_outbox(outbox, now)
+    
+    def fail_job(self, key, job, error):
+        """Abandonne une tâche dont l'erreur ne peut pas se résoudre en réessayant"""
+        job['status'] = 'failed'
+        job['last_error'] = str(error)
+        print(f"❌ Tâche {key} abandonnée: {error}")
+    
+    def retry_job(self, key, job, error):
+        """Replanifie une tâche en erreur temporaire avec un backoff exponentiel"""
+        job['last_error'] = str(error)
+        if job['attempts'] >= OUTBOX_MAX_ATTEMPTS:
+            job['status'] = 'failed'
+            print(f"❌ Tâche {key} abandonnée après {job['attempts']} tentative(s): {error}")
+            return
+        
+        delay = min(OUTBOX_BACKOFF_BASE * 2 ** (job['attempts'] - 1), OUTBOX_BACKOFF_MAX)
+        job['status'] = 'pending'
+        job['next_attempt'] = (datetime.now() + timedelta(seconds=delay)).isoformat()
+        print(f"⚠️ Tâche {key} en échec, nouvelle tentative dans {delay}s: {error}")
+    
+    def purge_outbox(self, outbox, now):
+        """Supprime les tâches terminées plus anciennes que la durée de rétention"""
+        limit = (now - timedelta(days=OUTBOX_RETENTION_DAYS)).strftime('%Y-%m-%d')
+        old_keys = [
+            key for key, job in outbox['jobs'].items()
+            if job['status'] in ('sent', 'failed', 'expired') and job['date'] < limit
+        ]
+        
+        if old_keys:
+            for key in old_keys:
+                del outbox['jobs'][key]
+            self.save_outbox(outbox)
+    
+    def report_outbox(self, outbox, now):
+        """Affiche la profondeur de la file et le retard de la plus ancienne tâche"""
+        pending = [job for job in outbox['jobs'].values() if job['status'] in ('pending', 'sending')]
+        if not pending:
+            return
+        
+        oldest = min(datetime.fromisoformat(job['created_at']) for job in pending)
+        lag = (now - oldest).total_seconds()
+        print(f"📬 Outbox: {len(pending)} tâche(s) en attente, retard max {lag:.0f}s")
+    
+    async def deliver_announcement(self, job):
+        """Envoie le message d'anniversaire d'une tâche de l'outbox"""
+        
+        channel = self.bot.get_channel(job['channel_id'])
+        if not channel:
+            channel = await self.bot.fetch_channel(job['channel_id'])
+        
+        user = await self.bot.fetch_user(int(job['user_id']))
+        
+        # Nouvelle tentative (après un crash, un timeout ou une erreur 5xx) : le message
+        # a pu être posté malgré l'erreur, on vérifie avant de le renvoyer
+        if job['attempts'] > 1 and await self.already_announced(channel, user):
+            print(f"ℹ️ Annonce déjà envoyée pour {user}, ignorée")
+            return
+        
+        # Récupère le pseudo du serveur
+        guild = channel.guild
+        display_name = self.get_display_name(guild, job['user_id'])
+        
+        # Calcul de l'âge si disponible
+        data = self.load_birthdays()
+        info = data['birthdays'].get(job['user_id'], {})
+        age_text = ""
+        if info.get('year'):
+            age = int(job['date'][:4]) - info['year']
+            age_text = f" qui fête ses **{age} ans**"
+        
+        embed = discord.Embed(
+            title=f"{self.emojis['party']} Joyeux Anniversaire! {self.emojis['cake']}",
+            description=f"Aujourd'hui c'est l'anniversaire de {user.mention}{age_text}!\n\n"
+                       f"{self.emojis['gift']} Souhaitons-lui un excellent anniversaire! {self.emojis['balloon']}",
+            color=self.color('primary')
+        )
+        
+        embed.set_thumbnail(url=user.display_avatar.url)
+        embed.set_footer(text=f"🎊 Bon anniversaire {display_name}! 🎊")
+        
+        await channel.send(embed=embed)
+    
+    async def already_announced(self, channel, user):
+        """Cherche dans les messages du jour une annonce du bot pour ce membre"""
+        start_of_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        async for message in channel.history(limit=100, after=start_of_day):
+            if message.author.id != self.bot.user.id:
+                continue
+            for embed in message.embeds:
+                if embed.description and user.mention in embed.description:
+                    return True
+        return False
     
     @check_birthdays.before_loop
     async def before_check_birthdays(self):
@@ -128,6 +330,8 @@ class BirthdayTasks(commands.Cog):
         next_run = now.replace(hour=check_hour, minute=check_minute, second=0, microsecond=0)
         
         if next_run < now:
+            # Rattrapage après un redémarrage : l'outbox évite les doublons
+            await self.plan_birthdays(now)
             next_run += timedelta(days=1)
         
         wait_seconds = (next_run - now).total_seconds()
@@ -135,62 +339,61 @@ class BirthdayTasks(commands.Cog):
         
         await discord.utils.sleep_until(next_run)
     
-    async def create_birthday_event(self, user, birthday_info, guild):
-        """Crée un événement Discord pour l'anniversaire (année prochaine)"""
+    async def create_birthday_event(self, user_id, job, guild):
+        """Crée un événement Discord pour l'anniversaire (année prochaine)
         
-        try:
+        Les erreurs Discord sont propagées pour que l'outbox puisse réessayer.
+        """
+        
+        if not guild:
+            guild_id = os.getenv('GUILD_ID')
+            if not guild_id:
+                return
+            guild = self.bot.get_guild(int(guild_id))
             if not guild:
-                guild_id = os.getenv('GUILD_ID')
-                if not guild_id:
-                    return
-                guild = self.bot.get_guild(int(guild_id))
-                if not guild:
-                    return
-            
-            # Récupère le pseudo du serveur
-            display_name = self.get_display_name(guild, birthday_info['user_id'])
-            
-            # Date de l'anniversaire l'année prochaine
-            today = datetime.now()
-            next_birthday = datetime(
-                today.year + 1,
-                birthday_info.get('month', today.month),
-                birthday_info.get('day', today.day),
-                0, 0  # 14h00
-            )
-            
-            # Calcul de l'âge si disponible
-            age_text = ""
-            if birthday_info.get('year'):
-                age = next_birthday.year - birthday_info['year']
-                age_text = f" ({age} ans)"
-            
-            event_name = f"🎂 Anniversaire de {display_name}{age_text}"
-            
-            # Vérifier si l'événement existe déjà
-            existing_events = await guild.fetch_scheduled_events()
-            for event in existing_events:
-                if event.name.lower() == event_name.lower():
-                    print(f"ℹ️ Événement déjà existant pour {display_name}")
-                    return
-            
-            # Création de l'événement (location est simplement une string pour external events)
-            await guild.create_scheduled_event(
-                name=event_name,
-                description=f"Joyeux anniversaire à {display_name}! 🎉🎊🎁\n\nN'oubliez pas de lui souhaiter un bon anniversaire!",
-                start_time=next_birthday,
-                end_time=next_birthday.replace(hour=23, minute=59),  # Fin de journée
-                location="🎈 Serveur Discord"
-            )
-            
-            print(f"✅ Événement créé pour l'anniversaire de {display_name} (année prochaine)")
-            
-        except discord.Forbidden:
-            print(f"❌ Permission refusée pour créer l'événement de {display_name}")
-        except discord.HTTPException as e:
-            print(f"❌ Erreur HTTP lors de la création de l'événement: {e}")
-        except Exception as e:
-            print(f"❌ Erreur lors de la création de l'événement: {e}")
+                return
+        
+        data = self.load_birthdays()
+        birthday_info = data['birthdays'].get(str(user_id))
+        if not birthday_info:
+            return
+        
+        # Récupère le pseudo du serveur
+        display_name = self.get_display_name(guild, user_id)
+        
+        # Date de l'anniversaire l'année prochaine
+        next_birthday = datetime(
+            int(job['date'][:4]) + 1,
+            birthday_info['month'],
+            birthday_info['day'],
+            0, 0  # 14h00
+        )
+        
+        # Calcul de l'âge si disponible
+        age_text = ""
+        if birthday_info.get('year'):
+            age = next_birthday.year - birthday_info['year']
+            age_text = f" ({age} ans)"
+        
+        event_name = f"🎂 Anniversaire de {display_name}{age_text}"
+        
+        # Vérifier si l'événement existe déjà
+        existing_events = await guild.fetch_scheduled_events()
+        for event in existing_events:
+            if event.name.lower() == event_name.lower():
+                print(f"ℹ️ Événement déjà existant pour {display_name}")
+                return
+        
+        # Création de l'événement (location est simplement une string pour external events)
+        await guild.create_scheduled_event(
+            name=event_name,
+            description=f"Joyeux anniversaire à {display_name}! 🎉🎊🎁\n\nN'oubliez pas de lui souhaiter un bon anniversaire!",
+            start_time=next_birthday,
+            end_time=next_birthday.replace(hour=23, minute=59),  # Fin de journée
+            location="🎈 Serveur Discord"
+        )
+        
+        print(f"✅ Événement créé pour l'anniversaire de {display_name} (année prochaine)")
 
 def setup(bot):
     bot.add_cog(BirthdayTasks(bot))
@@ -0,0 +1,170 @@
+"""
+Module de rechargement à chaud de birthdays.json et config.json
+"""
+
+from discord.ext import commands, tasks
+from datetime import datetime
+import json
+import os
+import time
+
+# Intervalle (secondes) entre deux vérifications des fichiers surveillés
+RELOAD_INTERVAL = 2
+
+class HotReload(commands.Cog):
+    """Surveille les fichiers de données et propage les modifications externes"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.data_file = 'data/birthdays.json'
+        self.config_file = 'config.json'
+        
+        # État connu : dernière modification et copie des anniversaires
+        self.data_mtime = self.get_mtime(self.data_file)
+        self.config_mtime = self.get_mtime(self.config_file)
+        self.birthdays = self.load_birthdays().get('birthdays', {})
+        
+        self.watch_files.start()
+    
+    def cog_unload(self):
+        """Arrêt de la surveillance lors du déchargement du cog"""
+        self.watch_files.cancel()
+    
+    def get_mtime(self, path):
+        """Retourne la date de dernière modification d'un fichier (ou None)"""
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def load_birthdays(self):
+        """Charge les anniversaires depuis le fichier JSON"""
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"birthdays": {}}
+    
+    def diff_birthdays(self, old, new):
+        """Compare deux états et retourne les (user_id, avant, après) modifiés"""
+        changes = []
+        for user_id, info in new.items():
+            if old.get(user_id) != info:
+                changes.append((user_id, old.get(user_id), info))
+        for user_id, info in old.items():
+            if user_id not in new:
+                changes.append((user_id, info, None))
+        return changes
+    
+    @tasks.loop(seconds=RELOAD_INTERVAL)
+    async def watch_files(self):
+        """Détecte les modifications des fichiers surveillés"""
+        
+        # Une exception non gérée arrêterait définitivement la boucle
+        try:
+            mtime = self.get_mtime(self.data_file)
+            if mtime != self.data_mtime:
+                self.data_mtime = mtime
+                self.reload_birthdays()
+            
+            mtime = self.get_mtime(self.config_file)
+            if mtime != self.config_mtime:
+                self.config_mtime = mtime
+                self.reload_config()
+        except Exception as e:
+            print(f"❌ Erreur lors du rechargement à chaud: {e}")
+    
+    @watch_files.before_loop
+    async def before_watch_files(self):
+        """Attend que le bot soit prêt avant de surveiller les fichiers"""
+        await self.bot.wait_until_ready()
+    
+    def is_valid_record(self, info):
+        """Vérifie qu'un anniversaire modifié à la main est exploitable par les cogs"""
+        if not isinstance(info, dict):
+            return False
+        day, month = info.get('day'), info.get('month')
+        if type(day) is not int or type(month) is not int:
+            return False
+        try:
+            datetime(2000, month, day)  # Année bissextile pour accepter le 29 février
+        except ValueError:
+            return False
+        year = info.get('year')
+        return year is None or type(year) is int
+    
+    def reload_birthdays(self):
+        """Applique uniquement les anniversaires modifiés aux index des autres cogs"""
+        
+        start = time.perf_counter()
+        
+        # Fichier absent (éditeur qui enregistre par renommage) : ce n'est pas une suppression
+        if not os.path.exists(self.data_file):
+            print(f"⚠️ {self.data_file} introuvable, rechargement ignoré")
+            return
+        
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            # Fichier en cours d'édition : on garde l'état précédent
+            print(f"⚠️ {self.data_file} illisible, rechargement ignoré: {e}")
+            return
+        
+        birthdays = data.get('birthdays') if isinstance(data, dict) else None
+        if not isinstance(birthdays, dict):
+            print(f"⚠️ {self.data_file} invalide (objet 'birthdays' attendu), rechargement ignoré")
+            return
+        
+        changes = []
+        for user_id, before, after in self.diff_birthdays(self.birthdays, birthdays):
+            if after is not None and not self.is_valid_record(after):
+                # Enregistrement invalide : l'état précédent reste appliqué
+                print(f"⚠️ Anniversaire invalide pour {user_id} ignoré: {after}")
+                continue
+            changes.append((user_id, before, after))
+        
+        for user_id, before, after in changes:
+            if after is None:
+                self.birthdays.pop(user_id, None)
+            else:
+                self.birthdays[user_id] = after
+            self.bot.dispatch('birthday_update', user_id, before, after)
+        
+        if changes:
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"🔄 {self.data_file} rechargé: {len(changes)} modification(s) en {elapsed:.1f} ms")
+    
+    def reload_config(self):
+        """Recharge config.json et le transmet aux cogs sans les recharger"""
+        
+        start = time.perf_counter()
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            # Les cogs lisent ces sections directement : on refuse une configuration incomplète
+            for month in range(1, 13):
+                config['months_fr'][str(month)]
+            for name in ('cake', 'party', 'gift', 'balloon'):
+                config['emojis'][name]
+            for name in ('primary', 'info', 'success', 'error'):
+                int(config['color'][name].lstrip('#'), 16)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"⚠️ {self.config_file} invalide, rechargement ignoré: {e!r}")
+            return
+        
+        self.bot.dispatch('config_update', config)
+        
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"🔄 {self.config_file} rechargé en {elapsed:.1f} ms")
+    
+    @commands.Cog.listener()
+    async def on_birthday_update(self, user_id, before, after):
+        """Suit les modifications faites par le bot pour ne pas les rediffuser"""
+        if after:
+            self.birthdays[user_id] = after
+        else:
+            self.birthdays.pop(user_id, None)
+
+def setup(bot):
+    bot.add_cog(HotReload(bot))
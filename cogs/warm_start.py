@@ -0,0 +1,195 @@
+"""
+Module de démarrage rapide : snapshot binaire des index et caches dérivés
+"""
+
+from discord.ext import commands, tasks
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+
+# Format du fichier : en-tête fixe puis état des cogs sérialisé avec marshal
+SNAPSHOT_MAGIC = b'WRNS'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct('<4sHHH32sIQ')  # magic, format, python (majeur, mineur), sha256 des données appliquées, crc32, taille
+SNAPSHOT_INTERVAL = 15                            # minutes entre deux snapshots périodiques
+
+class WarmStart(commands.Cog):
+    """Sauvegarde et restauration de l'état dérivé des cogs pour des redémarrages rapides"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.data_file = 'data/birthdays.json'
+        self.snapshot_file = 'data/snapshot.bin'
+        
+        self.ready = False
+        self.dirty = False
+        
+        # Anniversaires dont l'état des cogs est dérivé (pas forcément le fichier actuel)
+        self.birthdays = {}
+        
+        self.periodic_snapshot.start()
+    
+    def cog_unload(self):
+        """Arrêt de la tâche lors du déchargement du cog"""
+        self.periodic_snapshot.cancel()
+    
+    def stateful_cogs(self):
+        """Cogs exposant un état dérivé (snapshot_state / restore_state / rebuild_state)"""
+        return {
+            name: cog for name, cog in self.bot.cogs.items()
+            if hasattr(cog, 'snapshot_state')
+        }
+    
+    def load_birthdays(self):
+        """Charge les anniversaires depuis le fichier JSON"""
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"birthdays": {}}
+    
+    def data_version(self, birthdays):
+        """Empreinte canonique d'un ensemble d'anniversaires"""
+        canonical = json.dumps(birthdays, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).digest()
+    
+    def write_snapshot(self):
+        """Écrit le snapshot de façon atomique (fichier temporaire + remplacement)"""
+        
+        if not self.ready:
+            return
+        
+        start = time.perf_counter()
+        payload = marshal.dumps({
+            name: cog.snapshot_state() for name, cog in self.stateful_cogs().items()
+        })
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_VERSION,
+            sys.version_info.major,
+            sys.version_info.minor,
+            self.data_version(self.birthdays),
+            zlib.crc32(payload),
+            len(payload)
+        )
+        
+        tmp_file = f"{self.snapshot_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(header)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+        
+        self.dirty = False
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"💾 Snapshot écrit ({len(payload) / 1024:.0f} Ko) en {elapsed:.1f} ms")
+    
+    def read_snapshot(self):
+        """Lit le snapshot s'il est valide et correspond aux données actuelles"""
+        
+        try:
+            f = open(self.snapshot_file, 'rb')
+        except FileNotFoundError:
+            return None
+        
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if len(mm) < SNAPSHOT_HEADER.size:
+                print("⚠️ Snapshot tronqué, reconstruction des index")
+                return None
+            
+            magic, version, py_major, py_minor, data_hash, crc, length = SNAPSHOT_HEADER.unpack_from(mm)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                print("⚠️ Format de snapshot inconnu, reconstruction des index")
+                return None
+            if (py_major, py_minor) != sys.version_info[:2]:
+                print("⚠️ Snapshot écrit par une autre version de Python, reconstruction des index")
+                return None
+            if data_hash != self.data_version(self.birthdays):
+                print("ℹ️ Snapshot périmé (données modifiées), reconstruction des index")
+                return None
+            
+            view = memoryview(mm)[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + length]
+            try:
+                if len(view) != length or zlib.crc32(view) != crc:
+                    print("⚠️ Snapshot corrompu, reconstruction des index")
+                    return None
+                return marshal.loads(view)
+            finally:
+                view.release()
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Restaure les index depuis le snapshot, ou les reconstruit s'il est invalide"""
+        
+        # on_ready est rappelé à chaque reconnexion
+        if self.ready:
+            return
+        
+        start = time.perf_counter()
+        
+        # Données de référence : le snapshot doit avoir été dérivé exactement de celles-ci
+        self.birthdays = self.load_birthdays().get('birthdays', {})
+        try:
+            state = self.read_snapshot()
+        except Exception as e:
+            print(f"⚠️ Lecture du snapshot impossible: {e}")
+            state = None
+        
+        for name, cog in self.stateful_cogs().items():
+            if state and name in state:
+                try:
+                    # restore_state peut signaler un état rafraîchi (à réécrire)
+                    if cog.restore_state(state[name]):
+                        self.dirty = True
+                    continue
+                except Exception as e:
+                    print(f"⚠️ Restauration de {name} impossible, reconstruction: {e}")
+            cog.rebuild_state()
+            self.dirty = True
+        
+        self.ready = True
+        
+        elapsed = (time.perf_counter() - start) * 1000
+        source = "snapshot" if state else "reconstruction"
+        launch_time = getattr(self.bot, 'launch_time', None)
+        since_launch = f", {time.perf_counter() - launch_time:.1f}s après le lancement" if launch_time else ""
+        print(f"⚡ Index prêts ({source}) en {elapsed:.1f} ms{since_launch}")
+        
+        if self.dirty:
+            self.write_snapshot()
+    
+    @commands.Cog.listener()
+    async def on_birthday_update(self, user_id, before, after):
+        """Suit les anniversaires appliqués aux cogs et marque le snapshot comme périmé"""
+        if after:
+            self.birthdays[user_id] = after
+        else:
+            self.birthdays.pop(user_id, None)
+        self.dirty = True
+    
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Marque le snapshot comme périmé (pseudos résolus)"""
+        if before.display_name != after.display_name:
+            self.dirty = True
+    
+    @tasks.loop(minutes=SNAPSHOT_INTERVAL)
+    async def periodic_snapshot(self):
+        """Écrit régulièrement le snapshot si l'état a changé"""
+        if self.dirty:
+            self.write_snapshot()
+    
+    @periodic_snapshot.before_loop
+    async def before_periodic_snapshot(self):
+        """Attend que le bot soit prêt avant le premier snapshot"""
+        await self.bot.wait_until_ready()
+
+def setup(bot):
+    bot.add_cog(WarmStart(bot))
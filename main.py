@@ -7,6 +7,7 @@ import discord
 from discord.ext import commands
 import os
 import json
+import time
 from dotenv import load_dotenv
 
 # Chargement des variables d'environnement
@@ -60,7 +61,12 @@ def load_cogs():
     """Charge tous les modules (cogs) du bot"""
     cogs_list = [
         'cogs.birthday_commands',
-        'cogs.birthday_tasks'
+        'cogs.birthday_tasks',
+        'cogs.birthday_reminders',
+        'cogs.birthday_stats',
+        'cogs.birthday_cleanup',
+        'cogs.hot_reload',
+        'cogs.warm_start'
     ]
     
     for cog in cogs_list:
@@ -71,6 +77,8 @@ def load_cogs():
             print(f'❌ Erreur lors du chargement de {cog}: {e}')
 
 if __name__ == '__main__':
+    # Référence pour mesurer le temps de démarrage (cog WarmStart)
+    bot.launch_time = time.perf_counter()
     load_cogs()
     
     # Démarrage du bot
@@ -85,3 +93,8 @@ if __name__ == '__main__':
         print('❌ Token invalide. Vérifiez votre DISCORD_TOKEN.')
     except Exception as e:
         print(f'❌ Erreur lors du démarrage: {e}')
+    
+    # Snapshot des index à l'arrêt propre du bot
+    warm_start = bot.get_cog('WarmStart')
+    if warm_start:
+        warm_start.write_snapshot()